@@ -5,9 +5,13 @@ This script reads .h files with RLE compressed animation data and creates
 binary files suitable for on-demand loading from SPIFFS filesystem.
 """
 
+import binascii
+import mmap
 import os
+import pickle
 import re
 import struct
+from concurrent.futures import ProcessPoolExecutor
 
 # Animation files to convert
 ANIMATIONS = [
@@ -17,49 +21,74 @@ ANIMATIONS = [
     "sleepy", "sleepy_3"
 ]
 
+# .anim layouts, recorded in the first reserved header byte.
+# FIXED pads every frame to max_compressed_size after a uint16 size table;
+# PACKED stores frames back to back after a table of frame_count + 1 uint32
+# file offsets (frame i spans offsets[i]..offsets[i + 1]).
+LAYOUT_FIXED = 0
+LAYOUT_PACKED = 1
+
+# The sketches currently read only the fixed layout, so keep it the default
+PACKED_LAYOUT = False
+
+# 12-byte .anim header: frame_count, fps, max_compressed_size, layout, reserved
+_HEADER_STRUCT = struct.Struct('<HHHB5x')
+
+# Parsed headers are cached next to this script, keyed by file mtime and size.
+# Bump the version whenever parse_header_file's output changes.
+PARSE_CACHE_FILE = ".parse_cache.pkl"
+PARSE_CACHE_VERSION = 1
+
+# Precompiled patterns for the generated header format. Headers are plain
+# ASCII, so they are matched as bytes and never decoded. The metadata
+# constants and frame sizes table are matched by one alternation so the
+# text before the frame array is scanned only once. The sizes table may be
+# int or, from compact headers, a uint8_t/uint16_t PROGMEM array.
+_METADATA_RE = re.compile(
+    rb'const int \w+_(?P<key>FRAME_COUNT|FPS|MAX_COMPRESSED_SIZE) = (?P<value>\d+);'
+    rb'|const (?:int|uint8_t PROGMEM|uint16_t PROGMEM) \w+_frame_sizes\[\d+\] = \{(?P<sizes>[^}]+)\};')
+_FRAMES_START_RE = re.compile(rb'const uint8_t PROGMEM \w+_frames\[\]\[\d+\] = \{')
+
+# Separators stripped from a frame body before handing it to unhexlify
+_DROP_CHARS = b', \n\r\t'
+
 def parse_header_file(filename):
     """Parse animation header file and extract metadata and frame data"""
 
-    print(f"\nProcessing {filename}...")
-
-    with open(filename, 'r') as f:
+    with open(filename, 'rb') as f:
         content = f.read()
 
-    # Extract metadata
-    frame_count_match = re.search(r'const int \w+_FRAME_COUNT = (\d+);', content)
-    fps_match = re.search(r'const int \w+_FPS = (\d+);', content)
-    max_size_match = re.search(r'const int \w+_MAX_COMPRESSED_SIZE = (\d+);', content)
-
-    frame_count = int(frame_count_match.group(1))
-    fps = int(fps_match.group(1))
-    max_compressed_size = int(max_size_match.group(1))
+    # Locate the frame array; everything we need before it is metadata
+    frames_match = _FRAMES_START_RE.search(content)
 
-    print(f"  Frame count: {frame_count}")
-    print(f"  FPS: {fps}")
-    print(f"  Max compressed size: {max_compressed_size}")
+    # Extract metadata and frame sizes array in a single scan
+    metadata = {}
+    frame_sizes = None
+    for match in _METADATA_RE.finditer(content, 0, frames_match.start()):
+        if match.group('key'):
+            metadata[match.group('key').decode('ascii')] = int(match.group('value'))
+        else:
+            frame_sizes = [int(x) for x in match.group('sizes').split(b',') if x.strip()]
 
-    # Extract frame sizes array
-    frame_sizes_match = re.search(r'const int \w+_frame_sizes\[\d+\] = \{([^}]+)\};', content)
-    frame_sizes_str = frame_sizes_match.group(1)
-    frame_sizes = [int(x.strip()) for x in frame_sizes_str.split(',') if x.strip()]
+    frame_count = metadata['FRAME_COUNT']
+    fps = metadata['FPS']
+    max_compressed_size = metadata['MAX_COMPRESSED_SIZE']
 
-    # Extract frame data
-    frames_match = re.search(r'const uint8_t PROGMEM \w+_frames\[\]\[(\d+)\] = \{(.*?)\n\};', content, re.DOTALL)
-    frames_data_str = frames_match.group(2)
-
-    # Parse individual frames
-    frame_arrays = re.findall(r'\{([^}]+)\}', frames_data_str)
+    # Walk the frame array once, slicing out each {...} frame body
+    pos = frames_match.end()
+    frames_end = content.find(b'\n};', pos)
 
     frames = []
-    for i, frame_str in enumerate(frame_arrays):
-        if i >= frame_count:
+    while len(frames) < frame_count:
+        start = content.find(b'{', pos, frames_end)
+        if start < 0:
             break
-        # Parse hex values
-        hex_values = re.findall(r'0x([0-9A-Fa-f]{2})', frame_str)
-        frame_bytes = bytes([int(h, 16) for h in hex_values])
-        frames.append(frame_bytes)
+        end = content.find(b'}', start, frames_end)
 
-    print(f"  Extracted {len(frames)} frames")
+        # Parse hex values
+        cleaned = content[start + 1:end].translate(None, _DROP_CHARS).replace(b'0x', b'')
+        frames.append(binascii.unhexlify(cleaned))
+        pos = end + 1
 
     return {
         'frame_count': frame_count,
@@ -69,30 +98,107 @@ def parse_header_file(filename):
         'frames': frames
     }
 
-def create_binary_file(anim_name, anim_data, output_dir):
+def header_cache_key(filename):
+    """Return the key that identifies an unchanged header file"""
+
+    st = os.stat(filename)
+    return (PARSE_CACHE_VERSION, st.st_mtime_ns, st.st_size)
+
+def load_parse_cache(cache_file):
+    """Load the parse cache, or start a new one if it is missing or unreadable"""
+
+    try:
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        return {}
+
+def save_parse_cache(cache, cache_file):
+    """Write the parse cache back to disk"""
+
+    with open(cache_file, 'wb') as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def pack_anim_data(anim_data):
+    """Store frames as one bytes blob plus lengths to keep the cache compact"""
+
+    packed = dict(anim_data)
+    packed['frames'] = b''.join(anim_data['frames'])
+    packed['frame_lengths'] = [len(frame) for frame in anim_data['frames']]
+    return packed
+
+def unpack_anim_data(packed):
+    """Rebuild the parse_header_file result from a cache entry"""
+
+    anim_data = dict(packed)
+    blob = anim_data['frames']
+    frames = []
+    offset = 0
+    for length in anim_data.pop('frame_lengths'):
+        frames.append(blob[offset:offset + length])
+        offset += length
+    anim_data['frames'] = frames
+    return anim_data
+
+def print_anim_summary(anim_data):
+    """Print the metadata extracted by parse_header_file"""
+
+    print(f"  Frame count: {anim_data['frame_count']}")
+    print(f"  FPS: {anim_data['fps']}")
+    print(f"  Max compressed size: {anim_data['max_compressed_size']}")
+    print(f"  Extracted {len(anim_data['frames'])} frames")
+
+def create_binary_file(anim_name, anim_data, output_dir, packed=PACKED_LAYOUT):
     """Create binary file in SPIFFS format"""
 
     output_file = os.path.join(output_dir, f"{anim_name}.anim")
 
-    with open(output_file, 'wb') as f:
-        # Write header (12 bytes)
-        # Format: frame_count (2 bytes), fps (2 bytes), max_compressed_size (2 bytes), reserved (6 bytes)
-        f.write(struct.pack('<HHH6x',
-                          anim_data['frame_count'],
-                          anim_data['fps'],
-                          anim_data['max_compressed_size']))
-
-        # Write frame sizes array (2 bytes per frame)
-        for size in anim_data['frame_sizes']:
-            f.write(struct.pack('<H', size))
-
-        # Write frame data (each frame padded to max_compressed_size)
-        for i, frame in enumerate(anim_data['frames']):
-            f.write(frame)
-            # Pad to max_compressed_size
-            padding = anim_data['max_compressed_size'] - len(frame)
-            if padding > 0:
-                f.write(b'\x00' * padding)
+    frame_count = len(anim_data['frames'])
+    max_size = anim_data['max_compressed_size']
+    frame_sizes = anim_data['frame_sizes']
+
+    if packed:
+        # Drop the header padding and store each frame at its real size
+        frames = [frame[:size] for frame, size in zip(anim_data['frames'], frame_sizes)]
+        table = [12 + 4 * (frame_count + 1)]
+        for frame in frames:
+            table.append(table[-1] + len(frame))
+        frame_offsets = table[:-1]
+        total_size = table[-1]
+        table_format = f'<{frame_count + 1}I'
+        layout = LAYOUT_PACKED
+    else:
+        frames = anim_data['frames']
+        frame_data_start = 12 + 2 * len(frame_sizes)
+        table = frame_sizes
+        frame_offsets = [frame_data_start + i * max_size for i in range(frame_count)]
+        total_size = frame_data_start + frame_count * max_size
+        table_format = f'<{len(frame_sizes)}H'
+        layout = LAYOUT_FIXED
+
+    # Size the file up front and fill it through a memory map; the
+    # truncate zero-fills, so frame padding needs no explicit writes.
+    # Opened w+b because mapping for write needs a readable handle.
+    with open(output_file, 'w+b') as f:
+        f.truncate(total_size)
+        with mmap.mmap(f.fileno(), total_size) as mm:
+            # Write header (12 bytes)
+            # Format: frame_count (2 bytes), fps (2 bytes), max_compressed_size (2 bytes),
+            # layout (1 byte), reserved (5 bytes)
+            _HEADER_STRUCT.pack_into(mm, 0,
+                                     anim_data['frame_count'],
+                                     anim_data['fps'],
+                                     max_size,
+                                     layout)
+
+            # Write frame table (uint16 sizes or uint32 offsets)
+            struct.pack_into(table_format, mm, 12, *table)
+
+            # Write frame data
+            for offset, frame in zip(frame_offsets, frames):
+                mm[offset:offset + len(frame)] = frame
+
+            mm.flush()
 
     file_size = os.path.getsize(output_file)
     print(f"  Created {output_file} ({file_size} bytes)")
@@ -127,6 +233,7 @@ def main():
     animations_info = {}
     total_size = 0
 
+    header_files = {}
     for anim_name in ANIMATIONS:
         header_file = os.path.join(script_dir, f"{anim_name}.h")
 
@@ -134,20 +241,56 @@ def main():
             print(f"Warning: {header_file} not found, skipping...")
             continue
 
-        try:
-            # Parse header file
-            anim_data = parse_header_file(header_file)
-
-            # Create binary file
-            file_size = create_binary_file(anim_name, anim_data, output_dir)
-
-            animations_info[anim_name] = anim_data
-            total_size += file_size
-
-        except Exception as e:
-            print(f"Error processing {anim_name}: {e}")
-            import traceback
-            traceback.print_exc()
+        header_files[anim_name] = header_file
+
+    # Reuse parse results for headers that have not changed since last run
+    cache_file = os.path.join(script_dir, PARSE_CACHE_FILE)
+    parse_cache = load_parse_cache(cache_file)
+    new_cache = {}
+    cache_keys = {}
+    cached = {}
+
+    for anim_name, header_file in header_files.items():
+        cache_keys[anim_name] = header_cache_key(header_file)
+        entry = parse_cache.get(header_file)
+        if entry and entry[0] == cache_keys[anim_name]:
+            cached[anim_name] = unpack_anim_data(entry[1])
+            new_cache[header_file] = entry
+
+    # Parsing is CPU-bound and independent per file, so run it in worker
+    # processes; the small binary writes stay in this process, in order
+    with ProcessPoolExecutor() as executor:
+        futures = {anim_name: executor.submit(parse_header_file, header_file)
+                   for anim_name, header_file in header_files.items()
+                   if anim_name not in cached}
+
+        for anim_name, header_file in header_files.items():
+            print(f"\nProcessing {header_file}...")
+
+            try:
+                # Parse header file
+                if anim_name in cached:
+                    anim_data = cached[anim_name]
+                    print("  Unchanged, using cached parse")
+                else:
+                    anim_data = futures[anim_name].result()
+                    new_cache[header_file] = (cache_keys[anim_name],
+                                              pack_anim_data(anim_data))
+                print_anim_summary(anim_data)
+
+                # Create binary file
+                file_size = create_binary_file(anim_name, anim_data, output_dir)
+
+                animations_info[anim_name] = anim_data
+                total_size += file_size
+
+            except Exception as e:
+                print(f"Error processing {anim_name}: {e}")
+                import traceback
+                traceback.print_exc()
+
+    # Entries for changed or removed headers are dropped here
+    save_parse_cache(new_cache, cache_file)
 
     # Create manifest
     if animations_info:
@@ -1,5 +1,7 @@
+import io
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from PIL import Image
 import matplotlib.pyplot as plt
@@ -9,13 +11,67 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 from tkinter import ttk
 
+# '0x00'..'0xFF' indexed by byte value, for formatting whole frames at once
+_HEX_LUT = np.array([f'0x{i:02X}' for i in range(256)])
+
+# Row of 8 pixels (0 or 255, MSB leftmost) for every byte value, so a
+# frame is expanded with one table lookup
+_BIT_LUT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1) * np.uint8(255)
+
+# Frame number in a file name; parsing requires the separator, sorting
+# also accepts names like frame12.h picked up by the fallback glob
+_FRAME_NUM_RE = re.compile(r'frame[_-]0*(\d+)')
+_FRAME_SORT_RE = re.compile(r'frame[_-]?0*(\d+)')
+
+# Separators stripped from the array body before handing it to bytes.fromhex
+_DROP_TABLE = str.maketrans('', '', ', \n\r\t')
+_HEX_BYTE_RE = re.compile(r'0x([0-9A-Fa-f]{2})')
+
+def decode_hex_body(body):
+    """Decode the 0xNN literals of an array body into bytes"""
+    # Fast path: a body of nothing but 0xNN literals and separators decodes
+    # in one call, giving exactly one byte per literal
+    try:
+        data = bytes.fromhex(body.translate(_DROP_TABLE).replace('0x', ''))
+    except ValueError:
+        data = None
+    
+    # Comments or other text in the body: scan for the literals instead
+    if data is None or len(data) != body.count('0x'):
+        data = bytes.fromhex(''.join(_HEX_BYTE_RE.findall(body)))
+    return data
+
+def list_frame_files(directory, prefix='frame_'):
+    """Paths of the <prefix>*.h files in directory, in no particular order"""
+    # One scandir pass with plain string tests instead of glob's fnmatch
+    with os.scandir(directory) as entries:
+        return [Path(entry.path) for entry in entries
+                if entry.name.startswith(prefix) and entry.name.endswith('.h')]
+
+def sort_frame_num(filepath):
+    """Sort key for frame files: the number in the name, or 0"""
+    match = _FRAME_SORT_RE.search(filepath.name)
+    return int(match.group(1)) if match else 0
+
 class FrameAnalyzer:
     def __init__(self, frames_directory, byte_format='horizontal'):
         self.frames_dir = Path(frames_directory)
-        self.frames = {}
         self.width = 128
         self.height = 64
         self.byte_format = byte_format
+        self._nbytes = self.width * self.height // 8
+        
+        # Frames are stored column-wise: row i of self.data holds the packed
+        # bytes of frame self.frame_nums[i], loaded from self.paths[i]
+        self.data = np.empty((0, self._nbytes), dtype=np.uint8)
+        self.frame_nums = np.empty(0, dtype=np.int32)
+        self.paths = []
+        # Frame number -> row index
+        self.frames = {}
+        # Set by load_all_frames so GUI callbacks never rescan the keys
+        self.min_frame = None
+        self.max_frame = None
+        self._keyset = frozenset()
         
     def parse_frame_file(self, filepath):
         """Parse a .h file and extract bitmap data"""
@@ -23,68 +79,102 @@ class FrameAnalyzer:
             content = f.read()
         
         # Extract frame number from filename
-        match = re.search(r'frame[_-]0*(\d+)', filepath.name)
+        match = _FRAME_NUM_RE.search(filepath.name)
         if not match:
             return None
         frame_num = int(match.group(1))
         
-        # Extract hex data
-        hex_data = re.findall(r'0x[0-9A-Fa-f]{2}', content)
+        # Extract hex data from the array body
+        start = content.find('{')
+        end = content.find('}', start)
+        if start < 0 or end < 0:
+            return None
         
-        if not hex_data:
+        data = decode_hex_body(content[start + 1:end])
+        if not data:
             return None
             
-        # Convert hex strings to integers
-        byte_array = [int(x, 16) for x in hex_data]
+        byte_array = np.frombuffer(data, dtype=np.uint8)
         
         return frame_num, byte_array
     
+    def bytes_to_pixels_horizontal(self, byte_array):
+        """Unpack horizontally ordered bytes into a 0/255 pixel array"""
+        # Short frames are zero-filled, extra bytes are ignored
+        packed = np.zeros(self._nbytes, dtype=np.uint8)
+        data = np.asarray(byte_array, dtype=np.uint8)[:self._nbytes]
+        packed[:data.size] = data
+        
+        return _BIT_LUT[packed].reshape(self.height, self.width)
+    
     def bytes_to_image_horizontal(self, byte_array):
         """Convert byte array with horizontal byte ordering"""
-        img_array = np.zeros((self.height, self.width), dtype=np.uint8)
-        
-        byte_idx = 0
-        for y in range(self.height):
-            for x_byte in range(self.width // 8):
-                if byte_idx < len(byte_array):
-                    byte_val = byte_array[byte_idx]
-                    for bit in range(8):
-                        x = x_byte * 8 + bit
-                        if byte_val & (1 << (7 - bit)):
-                            img_array[y, x] = 255
-                    byte_idx += 1
+        return Image.fromarray(self.bytes_to_pixels_horizontal(byte_array), mode='L')
+    
+    def frame_data(self, frame_num):
+        """Packed bytes of a loaded frame (a view into self.data)"""
+        return self.data[self.frames[frame_num]]
+    
+    def frame_pixels(self, frame_num):
+        """Decode a loaded frame into a pixel array on demand"""
+        return self.bytes_to_pixels_horizontal(self.frame_data(frame_num))
+    
+    def _load_frame_into(self, row, filepath):
+        """Parse a frame file into row of self.data; returns its frame number"""
+        result = self.parse_frame_file(filepath)
+        if not result:
+            return None
         
-        return Image.fromarray(img_array, mode='L')
+        frame_num, byte_array = result
+        byte_array = byte_array[:self._nbytes]
+        self.data[row, :len(byte_array)] = byte_array
+        return frame_num
     
     def load_all_frames(self):
         """Load all frame files from directory"""
-        frame_files = list(self.frames_dir.glob('frame_*.h'))
+        frame_files = list_frame_files(self.frames_dir)
         if not frame_files:
-            frame_files = list(self.frames_dir.glob('frame*.h'))
+            frame_files = list_frame_files(self.frames_dir, prefix='frame')
         
-        def get_frame_num(filepath):
-            match = re.search(r'frame[_-]?0*(\d+)', filepath.name)
-            return int(match.group(1)) if match else 0
-        
-        frame_files.sort(key=get_frame_num)
+        frame_files.sort(key=sort_frame_num)
         
         print(f"Found {len(frame_files)} frame files")
         print("Loading frames", end='', flush=True)
         
-        for i, filepath in enumerate(frame_files):
-            result = self.parse_frame_file(filepath)
-            if result:
-                frame_num, byte_array = result
-                img = self.bytes_to_image_horizontal(byte_array)
-                    
-                self.frames[frame_num] = {
-                    'image': img,
-                    'data': byte_array,
-                    'path': filepath
-                }
+        # One row per file; short frames stay zero-filled
+        self.data = np.zeros((len(frame_files), self._nbytes), dtype=np.uint8)
+        self.frame_nums = np.empty(len(frame_files), dtype=np.int32)
+        self.paths = []
+        self.frames = {}
+        
+        # File reads release the GIL, so threads overlap disk I/O with
+        # parsing; each worker writes its frame straight into row i and
+        # map keeps the file order
+        loaded = []
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(self._load_frame_into, range(len(frame_files)), frame_files)
             
-            if (i + 1) % 50 == 0:
-                print('.', end='', flush=True)
+            for i, (filepath, frame_num) in enumerate(zip(frame_files, results)):
+                if frame_num is not None:
+                    row = len(self.paths)
+                    loaded.append(i)
+                    self.frame_nums[row] = frame_num
+                    self.paths.append(filepath)
+                    self.frames[frame_num] = row
+                
+                if (i + 1) % 50 == 0:
+                    print('.', end='', flush=True)
+        
+        # Drop the rows of files that failed to parse
+        if len(loaded) < len(frame_files):
+            self.data = self.data[loaded]
+        self.frame_nums = self.frame_nums[:len(self.paths)]
+        
+        self._keyset = frozenset(self.frames)
+        if self.frames:
+            self.min_frame = min(self.frames)
+            self.max_frame = max(self.frames)
         
         print()
         print(f"Successfully loaded {len(self.frames)} frames")
@@ -128,7 +218,7 @@ class FrameAnalyzer:
                 break
             
             if frame_num in self.frames:
-                axes[idx].imshow(self.frames[frame_num]['image'], cmap='gray')
+                axes[idx].imshow(self.frame_pixels(frame_num), cmap='gray')
                 axes[idx].set_title(f'{frame_num}', fontsize=8)
                 axes[idx].axis('off')
         
@@ -150,56 +240,53 @@ class FrameAnalyzer:
         total_size = frame_count * bytes_per_frame
         frame_delay = int(1000 / fps)
         
-        with open(output_path, 'w') as f:
-            # Write header
-            f.write(f"#ifndef {guard_name}\n")
-            f.write(f"#define {guard_name}\n\n")
-            
-            f.write(f"// Auto-generated video data for {animation_name}\n")
-            f.write(f"// Frame count: {frame_count}\n")
-            f.write(f"// Frame rate: {fps} FPS\n")
-            f.write(f"// Bytes per frame: {bytes_per_frame}\n")
-            f.write(f"// Total size: {total_size} bytes\n\n")
+        # Build the whole header in memory and write it out in one go
+        buf = io.StringIO()
+        
+        # Write header
+        buf.write(f"#ifndef {guard_name}\n")
+        buf.write(f"#define {guard_name}\n\n")
+        
+        buf.write(f"// Auto-generated video data for {animation_name}\n")
+        buf.write(f"// Frame count: {frame_count}\n")
+        buf.write(f"// Frame rate: {fps} FPS\n")
+        buf.write(f"// Bytes per frame: {bytes_per_frame}\n")
+        buf.write(f"// Total size: {total_size} bytes\n\n")
+        
+        buf.write("#include <Arduino.h>\n\n")
+        
+        # Write metadata constants
+        buf.write(f"const int {animation_name}_FRAME_COUNT = {frame_count};\n")
+        buf.write(f"const int {animation_name}_FPS = {fps};\n")
+        buf.write(f"const int {animation_name}_FRAME_DELAY = {frame_delay}; // milliseconds\n\n")
+        
+        # Write frame data array
+        buf.write(f"const uint8_t PROGMEM {animation_name}_frames[][{bytes_per_frame}] = {{\n")
+        
+        for idx, frame_num in enumerate(frame_numbers):
+            if frame_num not in self.frames:
+                print(f"Warning: Frame {frame_num} not found, skipping")
+                continue
             
-            f.write("#include <Arduino.h>\n\n")
+            byte_array = self.frame_data(frame_num)
             
-            # Write metadata constants
-            f.write(f"const int {animation_name}_FRAME_COUNT = {frame_count};\n")
-            f.write(f"const int {animation_name}_FPS = {fps};\n")
-            f.write(f"const int {animation_name}_FRAME_DELAY = {frame_delay}; // milliseconds\n\n")
+            # Write frame opening
+            buf.write("  {\n")
             
-            # Write frame data array
-            f.write(f"const uint8_t PROGMEM {animation_name}_frames[][{bytes_per_frame}] = {{\n")
+            # Write bytes in rows of 16, formatted through the lookup table
+            rows = [','.join(row) for row in _HEX_LUT[byte_array].reshape(-1, 16)]
+            buf.write('    ' + ',\n    '.join(rows) + '\n')
             
-            for idx, frame_num in enumerate(frame_numbers):
-                if frame_num not in self.frames:
-                    print(f"Warning: Frame {frame_num} not found, skipping")
-                    continue
-                
-                byte_array = self.frames[frame_num]['data']
-                
-                # Write frame opening
-                f.write("  {\n")
-                
-                # Write bytes in rows of 16
-                for i in range(0, len(byte_array), 16):
-                    chunk = byte_array[i:i+16]
-                    hex_values = ','.join(f'0x{b:02X}' for b in chunk)
-                    
-                    # Add comma at end if not last line
-                    if i + 16 < len(byte_array):
-                        f.write(f"    {hex_values},\n")
-                    else:
-                        f.write(f"    {hex_values}\n")
-                
-                # Write frame closing
-                if idx < len(frame_numbers) - 1:
-                    f.write("  },\n")
-                else:
-                    f.write("  }\n")
-            
-            f.write("};\n\n")
-            f.write(f"#endif // {guard_name}\n")
+            # Write frame closing
+            if idx < len(frame_numbers) - 1:
+                buf.write("  },\n")
+            else:
+                buf.write("  }\n")
+        
+        buf.write("};\n\n")
+        buf.write(f"#endif // {guard_name}\n")
+        
+        Path(output_path).write_bytes(buf.getvalue().encode('ascii'))
         
         print(f"\nHeader file saved to: {output_path}")
         print(f"Animation name: {animation_name}")
@@ -209,8 +296,13 @@ class FrameAnalyzer:
 class ManualFrameSelector:
     def __init__(self, analyzer):
         self.analyzer = analyzer
-        self.selected_frames = []
+        self._selected = set()
         self.root = None
+    
+    @property
+    def selected_frames(self):
+        """Selected frame numbers in ascending order"""
+        return sorted(self._selected)
         
     def show_selector_gui(self):
         """Show GUI for manual frame selection"""
@@ -229,7 +321,7 @@ class ManualFrameSelector:
         
         # Available frames display
         info_label = ttk.Label(main_frame, 
-                              text=f"Available frames: {min(self.analyzer.frames.keys())} to {max(self.analyzer.frames.keys())}")
+                              text=f"Available frames: {self.analyzer.min_frame} to {self.analyzer.max_frame}")
         info_label.grid(row=1, column=0, columnspan=2, pady=5)
         
         # Input method selection
@@ -297,12 +389,7 @@ class ManualFrameSelector:
                 messagebox.showerror("Error", "Start frame must be less than or equal to end frame")
                 return
             
-            available_frames = sorted(self.analyzer.frames.keys())
-            for frame_num in range(start, end + 1):
-                if frame_num in available_frames and frame_num not in self.selected_frames:
-                    self.selected_frames.append(frame_num)
-            
-            self.selected_frames.sort()
+            self._selected |= set(range(start, end + 1)) & self.analyzer._keyset
             self.update_display()
             self.start_entry.delete(0, tk.END)
             self.end_entry.delete(0, tk.END)
@@ -316,12 +403,7 @@ class ManualFrameSelector:
             frames_text = self.frames_entry.get()
             frame_list = [int(f.strip()) for f in frames_text.split(',') if f.strip()]
             
-            available_frames = sorted(self.analyzer.frames.keys())
-            for frame_num in frame_list:
-                if frame_num in available_frames and frame_num not in self.selected_frames:
-                    self.selected_frames.append(frame_num)
-            
-            self.selected_frames.sort()
+            self._selected |= set(frame_list) & self.analyzer._keyset
             self.update_display()
             self.frames_entry.delete(0, tk.END)
             
@@ -331,30 +413,30 @@ class ManualFrameSelector:
     def update_display(self):
         """Update the selected frames display"""
         self.selected_text.delete(1.0, tk.END)
+        selected_frames = self.selected_frames
         
-        if self.selected_frames:
-            text = f"Total frames selected: {len(self.selected_frames)}\n\n"
-            text += "Frame numbers:\n"
-            
+        if selected_frames:
             # Display in rows of 10
-            for i in range(0, len(self.selected_frames), 10):
-                chunk = self.selected_frames[i:i+10]
-                text += ', '.join(map(str, chunk)) + '\n'
+            rows = [', '.join(map(str, selected_frames[i:i+10]))
+                    for i in range(0, len(selected_frames), 10)]
+            body = '\n'.join(rows)
+            text = (f"Total frames selected: {len(selected_frames)}\n\n"
+                    f"Frame numbers:\n{body}\n")
             
             self.selected_text.insert(1.0, text)
-            self.status_label.config(text=f"{len(self.selected_frames)} frames selected")
+            self.status_label.config(text=f"{len(selected_frames)} frames selected")
         else:
             self.selected_text.insert(1.0, "No frames selected")
             self.status_label.config(text="")
     
     def clear_selection(self):
         """Clear all selected frames"""
-        self.selected_frames = []
+        self._selected.clear()
         self.update_display()
     
     def preview_selection(self):
         """Preview the selected frames"""
-        if not self.selected_frames:
+        if not self._selected:
             messagebox.showwarning("Warning", "No frames selected")
             return
         
@@ -362,7 +444,7 @@ class ManualFrameSelector:
     
     def export_to_header(self):
         """Export selected frames to .h file"""
-        if not self.selected_frames:
+        if not self._selected:
             messagebox.showwarning("Warning", "No frames selected")
             return
         
@@ -430,7 +512,7 @@ def main():
         return
     
     # Verify frames exist
-    frame_files = list(Path(directory).glob('frame_*.h'))
+    frame_files = list_frame_files(directory)
     if not frame_files:
         messagebox.showerror("Error", f"No frame_*.h files found in:\n{directory}")
         return
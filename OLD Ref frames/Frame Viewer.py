@@ -1,5 +1,7 @@
 import os
 import re
+import functools
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from PIL import Image
 import matplotlib.pyplot as plt
@@ -8,6 +10,57 @@ from collections import defaultdict
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
+# Precompiled patterns for frame file names and their hex payload
+_FRAME_FILE_RE = re.compile(r'frame[_-]0*(\d+)')
+_FRAME_NUM_RE = re.compile(r'frame[_-]?0*(\d+)')
+
+# Separators stripped from the array body before handing it to bytes.fromhex
+_DROP_TABLE = str.maketrans('', '', ', \n\r\t')
+_HEX_BYTE_RE = re.compile(r'0x([0-9A-Fa-f]{2})')
+
+
+def decode_hex_body(body):
+    """Decode the 0xNN literals of an array body into bytes"""
+    # Fast path: a body of nothing but 0xNN literals and separators decodes
+    # in one call, giving exactly one byte per literal
+    try:
+        data = bytes.fromhex(body.translate(_DROP_TABLE).replace('0x', ''))
+    except ValueError:
+        data = None
+    
+    # Comments or other text in the body: scan for the literals instead
+    if data is None or len(data) != body.count('0x'):
+        data = bytes.fromhex(''.join(_HEX_BYTE_RE.findall(body)))
+    return data
+
+
+# Module-level so it can be shipped to worker processes
+def parse_frame_file(filepath):
+    """Parse a .h file and extract bitmap data"""
+    with open(filepath, 'r') as f:
+        content = f.read()
+    
+    # Extract frame number from filename - handles both frame_1.h and frame_00001.h
+    match = _FRAME_FILE_RE.search(filepath.name)
+    if not match:
+        return None
+    frame_num = int(match.group(1))
+    
+    # Extract hex data from the array body
+    start = content.find('{')
+    end = content.find('}', start)
+    if start < 0 or end < 0:
+        return None
+    
+    data = decode_hex_body(content[start + 1:end])
+    if not data:
+        return None
+        
+    byte_array = np.frombuffer(data, dtype=np.uint8)
+    
+    return frame_num, byte_array
+
+
 class FrameAnalyzer:
     def __init__(self, frames_directory, byte_format='vertical'):
         self.frames_dir = Path(frames_directory)
@@ -15,72 +68,63 @@ class FrameAnalyzer:
         self.width = 128
         self.height = 64
         self.byte_format = byte_format
+        # Scratch buffers reused by every frame conversion
+        self._packed_scratch = np.empty(self.width * self.height // 8, dtype=np.uint8)
+        self._pixel_scratch = np.empty((self.height, self.width), dtype=np.uint8)
+        # Images are decoded on first use and kept for the frames being viewed
+        self._image_for = functools.lru_cache(maxsize=256)(self._decode_image)
         
     def parse_frame_file(self, filepath):
         """Parse a .h file and extract bitmap data"""
-        with open(filepath, 'r') as f:
-            content = f.read()
-        
-        # Extract frame number from filename - handles both frame_1.h and frame_00001.h
-        match = re.search(r'frame[_-]0*(\d+)', filepath.name)
-        if not match:
-            return None
-        frame_num = int(match.group(1))
-        
-        # Extract hex data
-        hex_data = re.findall(r'0x[0-9A-Fa-f]{2}', content)
-        
-        if not hex_data:
-            return None
-            
-        # Convert hex strings to integers
-        byte_array = [int(x, 16) for x in hex_data]
-        
-        return frame_num, byte_array
+        return parse_frame_file(filepath)
+    
+    def _frame_buffer(self, byte_array):
+        """Copy one frame worth of bytes, zero-filled if short, into the scratch buffer"""
+        buf = self._packed_scratch
+        data = np.asarray(byte_array, dtype=np.uint8)[:buf.size]
+        buf[:data.size] = data
+        buf[data.size:] = 0
+        return buf
     
     def bytes_to_image(self, byte_array):
         """Convert byte array to PIL Image (128x64 monochrome)"""
-        img_array = np.zeros((self.height, self.width), dtype=np.uint8)
+        buf = self._frame_buffer(byte_array)
         
         # OLED format: 128 columns × 8 pages (8 rows of 8 pixels each)
         # Each byte represents 8 vertical pixels in a column
         # Layout: bytes are arranged as columns (x), then pages (y/8)
         
-        byte_idx = 0
-        for page in range(self.height // 8):  # 8 pages for 64 pixel height
-            for x in range(self.width):  # 128 columns
-                if byte_idx < len(byte_array):
-                    byte_val = byte_array[byte_idx]
-                    # Each bit in the byte represents a pixel
-                    # LSB = top pixel of the page
-                    for bit in range(8):
-                        y = page * 8 + bit
-                        if byte_val & (1 << bit):
-                            img_array[y, x] = 255
-                    byte_idx += 1
-        
-        return Image.fromarray(img_array, mode='L')
+        # Unpack to (page, x, bit) with LSB = top pixel of the page,
+        # then scale into the pixel scratch viewed as (page, bit, x) rows
+        pages = buf.reshape(self.height // 8, self.width, 1)
+        bits = np.unpackbits(pages, axis=2, bitorder='little')
+        rows = self._pixel_scratch.reshape(self.height // 8, 8, self.width)
+        np.multiply(bits.transpose(0, 2, 1), 255, out=rows)
+        
+        # fromarray shares memory, so the kept image needs its own copy
+        return Image.fromarray(self._pixel_scratch.copy(), mode='L')
     
     def bytes_to_image_horizontal(self, byte_array):
         """Alternative: Convert byte array with horizontal byte ordering"""
-        img_array = np.zeros((self.height, self.width), dtype=np.uint8)
+        buf = self._frame_buffer(byte_array)
         
         # Horizontal format: each byte represents 8 horizontal pixels
-        # Layout: left to right, top to bottom
-        
-        byte_idx = 0
-        for y in range(self.height):
-            for x_byte in range(self.width // 8):  # 16 bytes per row
-                if byte_idx < len(byte_array):
-                    byte_val = byte_array[byte_idx]
-                    for bit in range(8):
-                        x = x_byte * 8 + bit
-                        # MSB is leftmost pixel
-                        if byte_val & (1 << (7 - bit)):
-                            img_array[y, x] = 255
-                    byte_idx += 1
-        
-        return Image.fromarray(img_array, mode='L')
+        # Layout: left to right, top to bottom, MSB is leftmost pixel
+        # This is PIL's native 1-bit raw layout, so let its decoder unpack it
+        
+        img = Image.frombytes('1', (self.width, self.height), buf.tobytes())
+        return img.convert('L')
+    
+    def _decode_image(self, frame_num):
+        """Decode a loaded frame into an image using the selected byte format"""
+        frame = self.frames[frame_num]
+        if 'image' in frame:
+            return frame['image']
+        
+        byte_array = frame['data']
+        if self.byte_format == 'horizontal':
+            return self.bytes_to_image_horizontal(byte_array)
+        return self.bytes_to_image(byte_array)
     
     def test_both_formats(self, frame_num):
         """Test both byte ordering formats for a specific frame"""
@@ -111,7 +155,7 @@ class FrameAnalyzer:
         
         return img_vertical, img_horizontal
     
-    def load_all_frames(self):
+    def load_all_frames(self, need_images=False):
         """Load all frame files from directory"""
         # Try multiple patterns to find frame files
         frame_files = list(self.frames_dir.glob('frame_*.h'))
@@ -120,7 +164,7 @@ class FrameAnalyzer:
         
         # Sort by frame number, not filename
         def get_frame_num(filepath):
-            match = re.search(r'frame[_-]?0*(\d+)', filepath.name)
+            match = _FRAME_NUM_RE.search(filepath.name)
             return int(match.group(1)) if match else 0
         
         frame_files.sort(key=get_frame_num)
@@ -128,27 +172,29 @@ class FrameAnalyzer:
         print(f"Found {len(frame_files)} frame files")
         print("Loading frames", end='', flush=True)
         
+        self._image_for.cache_clear()
         loaded_count = 0
-        for i, filepath in enumerate(frame_files):
-            result = self.parse_frame_file(filepath)
-            if result:
-                frame_num, byte_array = result
-                # Use the selected byte format
-                if self.byte_format == 'horizontal':
-                    img = self.bytes_to_image_horizontal(byte_array)
-                else:
-                    img = self.bytes_to_image(byte_array)
-                    
-                self.frames[frame_num] = {
-                    'image': img,
-                    'data': byte_array,
-                    'path': filepath
-                }
-                loaded_count += 1
+        # Parsing is CPU-bound and independent per file, so spread it over
+        # worker processes; results come back in file order
+        with ProcessPoolExecutor() as executor:
+            results = executor.map(parse_frame_file, frame_files, chunksize=32)
             
-            # Progress indicator
-            if (i + 1) % 50 == 0:
-                print('.', end='', flush=True)
+            for i, (filepath, result) in enumerate(zip(frame_files, results)):
+                if result:
+                    frame_num, byte_array = result
+                    self.frames[frame_num] = {
+                        'data': byte_array,
+                        'path': filepath
+                    }
+                    # Grouping and reporting only need the raw bytes; images
+                    # are otherwise decoded on demand by _image_for
+                    if need_images:
+                        self.frames[frame_num]['image'] = self._decode_image(frame_num)
+                    loaded_count += 1
+                
+                # Progress indicator
+                if (i + 1) % 50 == 0:
+                    print('.', end='', flush=True)
         
         print()  # New line
         print(f"Successfully loaded {len(self.frames)} frames")
@@ -159,8 +205,21 @@ class FrameAnalyzer:
         if len(frame1_data) != len(frame2_data):
             return float('inf')
         
-        diff = sum(abs(a - b) for a, b in zip(frame1_data, frame2_data))
-        return diff / len(frame1_data)
+        diff = np.abs(np.asarray(frame1_data, dtype=np.int16) -
+                      np.asarray(frame2_data, dtype=np.int16))
+        return float(diff.mean())
+    
+    def adjacent_frame_differences(self, frame_numbers):
+        """Calculate the difference between each pair of consecutive frames"""
+        payloads = [self.frames[frame_num]['data'] for frame_num in frame_numbers]
+        
+        # Frames of equal size are diffed in one pass over a stacked matrix
+        if len({len(data) for data in payloads}) == 1:
+            stack = np.stack(payloads).astype(np.int16)
+            return np.abs(np.diff(stack, axis=0)).mean(axis=1)
+        
+        return [self.calculate_frame_difference(a, b)
+                for a, b in zip(payloads, payloads[1:])]
     
     def group_frames_by_similarity(self, threshold=10.0):
         """Group frames into videos based on scene changes"""
@@ -168,31 +227,13 @@ class FrameAnalyzer:
             self.load_all_frames()
         
         frame_numbers = sorted(self.frames.keys())
-        groups = []
-        current_group = [frame_numbers[0]]
+        diffs = np.asarray(self.adjacent_frame_differences(frame_numbers))
         
-        for i in range(1, len(frame_numbers)):
-            prev_frame = frame_numbers[i-1]
-            curr_frame = frame_numbers[i]
-            
-            # Calculate difference
-            diff = self.calculate_frame_difference(
-                self.frames[prev_frame]['data'],
-                self.frames[curr_frame]['data']
-            )
-            
-            # If difference is large, start a new group
-            if diff > threshold:
-                groups.append(current_group)
-                current_group = [curr_frame]
-            else:
-                current_group.append(curr_frame)
-        
-        # Add last group
-        if current_group:
-            groups.append(current_group)
+        # A large difference starts a new group; split at all of them at once
+        cuts = np.flatnonzero(diffs > threshold) + 1
+        groups = np.split(np.asarray(frame_numbers), cuts)
         
-        return groups
+        return [group.tolist() for group in groups]
     
     def preview_frames(self, frame_numbers=None, rows=None, cols=None, title='Frame Preview'):
         """Preview selected frames in a grid"""
@@ -221,29 +262,26 @@ class FrameAnalyzer:
         fig_width = min(20, cols * 2)
         fig_height = min(30, rows * 1.5)
         
-        fig, axes = plt.subplots(rows, cols, figsize=(fig_width, fig_height))
-        fig.suptitle(title, fontsize=16)
-        
-        # Handle single subplot case
-        if rows == 1 and cols == 1:
-            axes = np.array([[axes]])
-        elif rows == 1 or cols == 1:
-            axes = axes.reshape(rows, cols)
+        # Composite every thumbnail into one canvas and draw it with a single
+        # imshow; tiles are separated by a thin blank border
+        gap = 2
+        tile_w = self.width + gap
+        tile_h = self.height + gap
+        canvas = np.full((rows * tile_h - gap, cols * tile_w - gap), 255, dtype=np.uint8)
         
-        axes = axes.flatten()
+        fig, ax = plt.subplots(figsize=(fig_width, fig_height))
+        fig.suptitle(title, fontsize=16)
         
-        for idx, frame_num in enumerate(frame_numbers):
-            if idx >= len(axes):
-                break
-            
+        for idx, frame_num in enumerate(frame_numbers[:rows * cols]):
             if frame_num in self.frames:
-                axes[idx].imshow(self.frames[frame_num]['image'], cmap='gray')
-                axes[idx].set_title(f'{frame_num}', fontsize=8)
-                axes[idx].axis('off')
+                y = (idx // cols) * tile_h
+                x = (idx % cols) * tile_w
+                canvas[y:y + self.height, x:x + self.width] = np.asarray(self._image_for(frame_num))
+                ax.text(x + 2, y + 2, f'{frame_num}', fontsize=8, color='red',
+                        verticalalignment='top')
         
-        # Hide unused subplots
-        for idx in range(len(frame_numbers), len(axes)):
-            axes[idx].axis('off')
+        ax.imshow(canvas, cmap='gray', vmin=0, vmax=255)
+        ax.axis('off')
         
         plt.tight_layout()
         plt.show()
@@ -289,7 +327,7 @@ class FrameAnalyzer:
             for frame_idx, frame_num in enumerate(preview_frames):
                 if frame_num in self.frames:
                     axes[group_idx][frame_idx].imshow(
-                        self.frames[frame_num]['image'], cmap='gray'
+                        self._image_for(frame_num), cmap='gray'
                     )
                     axes[group_idx][frame_idx].set_title(f'F{frame_num}')
                     axes[group_idx][frame_idx].axis('off')
@@ -309,8 +347,10 @@ class FrameAnalyzer:
     
     def export_group_as_gif(self, group, output_path, duration=100):
         """Export a group of frames as an animated GIF"""
-        images = [self.frames[frame_num]['image'] for frame_num in group 
-                  if frame_num in self.frames]
+        # Frames are strictly black and white, so hand the GIF encoder 1-bit
+        # images and skip its per-frame palette quantization
+        images = [self._image_for(frame_num).convert('1', dither=Image.Dither.NONE)
+                  for frame_num in group if frame_num in self.frames]
         
         if images:
             images[0].save(
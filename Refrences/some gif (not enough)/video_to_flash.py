@@ -4,35 +4,253 @@ GIF to Flash Memory Converter
 Converts GIF files to C header files with bitmap arrays for ESP32
 """
 
+import contextlib
+import cProfile
 import cv2
+import io
 import numpy as np
 import os
+import pstats
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-class GifToFlash:
-    def __init__(self, display_width=128, display_height=64):
-        self.display_width = display_width
-        self.display_height = display_height
+# numba is optional; without it the RLE encoder is vectorized with NumPy
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _rle_encode_loop(data):
+    """RLE-encode a non-empty uint8 array into [count, value, ...] pairs"""
+    n = data.shape[0]
+    out = np.empty(2 * n, np.uint8)
+    o = 0
+    i = 0
+
+    while i < n:
+        # Scan the whole run, then split it at 255 once rather than
+        # checking the count limit on every byte
+        current_byte = data[i]
+        j = i + 1
+        while j < n and data[j] == current_byte:
+            j += 1
+
+        count = j - i
+        while count > 255:
+            out[o] = 255
+            out[o + 1] = current_byte
+            o += 2
+            count -= 255
+
+        out[o] = count
+        out[o + 1] = current_byte
+        o += 2
+        i = j
+
+    return out[:o]
+
+
+def _rle_encode_numpy(data):
+    """Vectorized equivalent of _rle_encode_loop"""
+    # Run boundaries are where the value changes, plus both ends
+    change = np.empty(data.shape[0] + 1, dtype=bool)
+    change[0] = change[-1] = True
+    np.not_equal(data[1:], data[:-1], out=change[1:-1])
+    bounds = np.flatnonzero(change)
+    lengths = np.diff(bounds)
+    values = data[bounds[:-1]]
+
+    # Runs longer than 255 are split into full 255-byte runs plus the rest
+    pieces = (lengths + 254) // 255
+    counts = np.full(pieces.sum(), 255, dtype=np.uint8)
+    counts[np.cumsum(pieces) - 1] = lengths - 255 * (pieces - 1)
+
+    out = np.empty(2 * counts.size, np.uint8)
+    out[0::2] = counts
+    out[1::2] = np.repeat(values, pieces)
+
+    return out
+
+
+if njit is not None:
+    _rle_encode = njit(cache=True)(_rle_encode_loop)
+else:
+    _rle_encode = _rle_encode_numpy
+
+# C hex literal for every byte value, used when writing frame arrays
+_HEX_LUT = tuple(f"0x{i:02X}" for i in range(256))
+
+# Static parts of the generated header, filled in once per file
+_PROLOGUE_TEMPLATE = """\
+#ifndef {guard}
+#define {guard}
+
+// Auto-generated GIF data for {name}
+// Frame count: {frame_count}
+// Frame rate: {fps} FPS
+// Uncompressed bytes per frame: {bytes_per_frame}
+"""
+
+_DECOMPRESS_TEMPLATE = """\
+// RLE Decompression function
+// Decompresses RLE data into output buffer
+// compressed: pointer to compressed data
+// compressed_size: size of compressed data
+// output: buffer to store decompressed data (must be {bytes_per_frame} bytes)
+void {name}_decompress(const uint8_t* compressed, int compressed_size, uint8_t* output) {{
+  int out_idx = 0;
+  for (int i = 0; i < compressed_size; i += 2) {{
+    uint8_t count = compressed[i];
+    uint8_t value = compressed[i + 1];
+    memset(output + out_idx, value, count);
+    out_idx += count;
+  }}
+}}
+
+"""
+
+_DECOMPRESS_WORDS_TEMPLATE = """\
+// RLE Decompression function
+// Decompresses RLE data into output buffer
+// runs: pointer to compressed data, one (value << 8) | count word per run
+// compressed_size: size of compressed data in bytes
+// output: buffer to store decompressed data (must be {bytes_per_frame} bytes)
+void {name}_decompress(const uint16_t* runs, int compressed_size, uint8_t* output) {{
+  int out_idx = 0;
+  for (int i = 0; i < compressed_size / 2; i++) {{
+    uint16_t run = runs[i];
+    uint8_t count = run & 0xFF;
+    memset(output + out_idx, run >> 8, count);
+    out_idx += count;
+  }}
+}}
+
+"""
+
+_DELTA_TEMPLATE = """\
+// Delta decompression function
+// XORs a decompressed delta frame onto output, which must hold the
+// previous frame; frame 0 is stored whole, decode it with {name}_decompress
+void {name}_apply_delta(const uint8_t* compressed, int compressed_size, uint8_t* output) {{
+  int out_idx = 0;
+  for (int i = 0; i < compressed_size; i += 2) {{
+    uint8_t count = compressed[i];
+    uint8_t value = compressed[i + 1];
+    if (value != 0) {{
+      for (uint8_t j = 0; j < count; j++) {{
+        output[out_idx + j] ^= value;
+      }}
+    }}
+    out_idx += count;
+  }}
+}}
+
+"""
+
+_DELTA_WORDS_TEMPLATE = """\
+// Delta decompression function
+// XORs a decompressed delta frame onto output, which must hold the
+// previous frame; frame 0 is stored whole, decode it with {name}_decompress
+void {name}_apply_delta(const uint16_t* runs, int compressed_size, uint8_t* output) {{
+  int out_idx = 0;
+  for (int i = 0; i < compressed_size / 2; i++) {{
+    uint16_t run = runs[i];
+    uint8_t count = run & 0xFF;
+    uint8_t value = run >> 8;
+    if (value != 0) {{
+      for (uint8_t j = 0; j < count; j++) {{
+        output[out_idx + j] ^= value;
+      }}
+    }}
+    out_idx += count;
+  }}
+}}
+
+"""
+
+# Compressed frames are emitted either as a 2-D array padded to the largest
+# frame (what the sketches include today) or, when packed, as one flat array
+# plus a uint32 offsets table (frame i spans offsets[i]..offsets[i + 1])
+PACKED_FRAMES = False
+
+# Compressed frames can also be emitted as uint16 words, one per
+# (count, value) run, so the decoder does a single 16-bit load per run.
+# The word is (value << 8) | count, the same bytes in little-endian order.
+RUN_WORDS = False
 
-    def process_frame(self, frame, flip_horizontal=False):
-        """Convert video frame to monochrome bitmap"""
-        # Flip horizontally if requested
-        if flip_horizontal:
-            frame = cv2.flip(frame, 1)
+# Delta mode stores frame 0 whole and every later frame XORed with the one
+# before it, so unchanged regions become long zero runs. Only the packed
+# layout turns that into flash savings; padded rows are still sized by the
+# largest frame.
+DELTA_FRAMES = False
 
-        # Resize to display dimensions
-        resized = cv2.resize(frame, (self.display_width, self.display_height))
+# Compact sizes emit {name}_frame_sizes as uint8_t or uint16_t, whichever
+# fits the largest frame, instead of int. Screen_Test.ino keeps the table in
+# a const int* field, so int stays the default.
+COMPACT_SIZES = False
 
-        # Convert to grayscale
-        gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+# Grayscale pixels brighter than this are lit on the display
+THRESHOLD = 128
 
-        # Apply binary threshold
-        _, binary = cv2.threshold(gray, 128, 255, cv2.THRESH_BINARY)
 
-        # Convert to bitmap format (1 bit per pixel, packed into bytes)
-        bitmap = np.packbits(binary > 0, axis=None)
+def _hex_lines(frame_data, words=False):
+    """Format frame bytes as C hex literals
 
-        return bitmap
+    Bytes are written 16 per line; with words, each byte pair becomes one
+    little-endian uint16 literal, 8 per line.
+    """
+    # Iterating bytes yields ints directly, with no NumPy scalars
+    frame_bytes = np.asarray(frame_data, dtype=np.uint8).tobytes()
+
+    if words:
+        tokens = [_HEX_LUT[value] + _HEX_LUT[count][2:]
+                  for count, value in zip(frame_bytes[0::2], frame_bytes[1::2])]
+        per_line = 8
+    else:
+        tokens = [_HEX_LUT[byte] for byte in frame_bytes]
+        per_line = 16
+
+    return [",".join(tokens[j:j + per_line]) for j in range(0, len(tokens), per_line)]
+
+
+def _write_constants(f, name, frame_count, fps, bytes_per_frame):
+    """Write the includes and the constants every header starts with"""
+    f.write("\n#include <Arduino.h>\n")
+    f.write("#include <string.h>\n\n")
+
+    # Frame count and FPS constants
+    f.write(f"const int {name}_FRAME_COUNT = {frame_count};\n")
+    f.write(f"const int {name}_FPS = {fps};\n")
+    f.write(f"const int {name}_FRAME_DELAY = {int(1000/fps)}; // milliseconds\n")
+    f.write(f"const int {name}_UNCOMPRESSED_SIZE = {bytes_per_frame};\n")
+
+
+def _write_frame_rows(f, name, elem_type, row_size, frames, sizes=None, words=False):
+    """Write frames as the 2-D {name}_frames[][row_size] array"""
+    frame_count = len(frames)
+    f.write(f"const {elem_type} PROGMEM {name}_frames[][{row_size}] = {{\n")
+
+    for i, frame_data in enumerate(frames):
+        # Rows shorter than row_size are not padded in the text: C
+        # zero-fills the rest of each row
+        lines = _hex_lines(frame_data, words)
+        f.write("  {\n    " + ",\n    ".join(lines) + "\n  }" if lines else "  {\n  }")
+        if i < frame_count - 1:
+            f.write(",")
+        f.write(f"  // Frame {i}")
+        if sizes is not None:
+            f.write(f" - {sizes[i]} bytes")
+        f.write("\n")
+
+    f.write("};\n\n")
+
+
+class GifToFlash:
+    def __init__(self, display_width=128, display_height=64):
+        self.display_width = display_width
+        self.display_height = display_height
 
     def convert_gif(self, gif_path, output_name, max_frames=60, target_fps=10):
         """
@@ -68,29 +286,39 @@ class GifToFlash:
         print(f"Converting at {target_fps} fps (skip every {frame_skip} frames)")
         print(f"Max frames: {max_frames}")
 
-        # Convert frames
-        frames = []
-        frame_num = 0
+        # Convert frames: each kept frame is resized and converted to
+        # grayscale straight into its slot, then all frames are thresholded
+        # and packed in one batch
+        all_gray = np.empty((max_frames, self.display_height, self.display_width), np.uint8)
         converted_count = 0
+        # Frames are decoded in one forward pass into a reused buffer
+        frame = None
 
         while converted_count < max_frames:
-            ret, frame = cap.read()
+            # Only process every Nth frame; grab() advances past the
+            # skipped frames without decoding them
+            if converted_count > 0:
+                for _ in range(frame_skip - 1):
+                    cap.grab()
+
+            ret, frame = cap.read(frame)
             if not ret:
                 break
 
-            # Only process every Nth frame
-            if frame_num % frame_skip == 0:
-                bitmap = self.process_frame(frame)
-                frames.append(bitmap)
-                converted_count += 1
+            resized = cv2.resize(frame, (self.display_width, self.display_height))
+            cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY, dst=all_gray[converted_count])
+            converted_count += 1
 
-                if converted_count % 10 == 0:
-                    print(f"Processed {converted_count}/{max_frames} frames...")
-
-            frame_num += 1
+            if converted_count % 10 == 0:
+                print(f"Processed {converted_count}/{max_frames} frames...")
 
         cap.release()
 
+        pixels = self.display_width * self.display_height
+        binary = all_gray[:converted_count].reshape(converted_count, pixels) > THRESHOLD
+        # packbits takes the boolean mask as is, so no 0/255 image is built
+        frames = np.packbits(binary, axis=-1)
+
         actual_frames = len(frames)
         print(f"Converted {actual_frames} frames")
 
@@ -110,152 +338,163 @@ class GifToFlash:
         if len(data) == 0:
             return []
 
-        compressed = []
-        current_byte = data[0]
-        count = 1
+        return _rle_encode(np.asarray(data, dtype=np.uint8))
 
-        for i in range(1, len(data)):
-            if data[i] == current_byte and count < 255:
-                count += 1
+    def generate_header(self, frames, name, output_path, fps, use_compression=True,
+                        packed_frames=PACKED_FRAMES, run_words=RUN_WORDS, delta_frames=DELTA_FRAMES,
+                        compact_sizes=COMPACT_SIZES):
+        """Generate C header file with frame data"""
+
+        frame_count = len(frames)
+        bytes_per_frame = len(frames[0]) if frame_count else 0
+
+        # The header is assembled in memory and written with a single call
+        with io.StringIO() as f:
+            # Header guard and summary
+            guard_name = f"{name.upper()}_H"
+            f.write(_PROLOGUE_TEMPLATE.format(guard=guard_name, name=name, frame_count=frame_count,
+                                              fps=fps, bytes_per_frame=bytes_per_frame))
+
+            # Compressed and raw headers share nothing past the prologue
+            if use_compression:
+                summary = self._emit_compressed(f, frames, name, fps, bytes_per_frame,
+                                                packed_frames, run_words, delta_frames, compact_sizes)
             else:
-                compressed.append(count)
-                compressed.append(current_byte)
-                current_byte = data[i]
-                count = 1
+                summary = self._emit_raw(f, frames, name, fps, bytes_per_frame)
 
-        # Add the last run
-        compressed.append(count)
-        compressed.append(current_byte)
+            f.write(f"#endif // {guard_name}\n")
 
-        return np.array(compressed, dtype=np.uint8)
+            Path(output_path).write_bytes(f.getvalue().encode('ascii'))
 
-    def generate_header(self, frames, name, output_path, fps, use_compression=True):
-        """Generate C header file with frame data"""
+        print(f"Generated: {output_path}")
+        for line in summary:
+            print(line)
+
+    def _emit_raw(self, f, frames, name, fps, bytes_per_frame):
+        """Write the body of an uncompressed header; returns summary lines"""
 
         frame_count = len(frames)
-        bytes_per_frame = len(frames[0]) if frames else 0
-
-        # Compress frames if enabled
-        if use_compression:
-            compressed_frames = [self.rle_compress(frame) for frame in frames]
-            compressed_sizes = [len(cf) for cf in compressed_frames]
-            max_compressed_size = max(compressed_sizes) if compressed_sizes else 0
-            total_compressed = sum(compressed_sizes)
-            total_uncompressed = frame_count * bytes_per_frame
-            compression_ratio = (1 - total_compressed / total_uncompressed) * 100 if total_uncompressed > 0 else 0
-        else:
-            compressed_frames = frames
-            max_compressed_size = bytes_per_frame
-            total_compressed = frame_count * bytes_per_frame
-            compression_ratio = 0
+        total_size = frame_count * bytes_per_frame
 
-        with open(output_path, 'w') as f:
-            # Header guard
-            guard_name = f"{name.upper()}_H"
-            f.write(f"#ifndef {guard_name}\n")
-            f.write(f"#define {guard_name}\n\n")
+        f.write(f"// Total size: {total_size} bytes\n")
+        _write_constants(f, name, frame_count, fps, bytes_per_frame)
+        f.write("\n")
 
-            f.write(f"// Auto-generated GIF data for {name}\n")
-            f.write(f"// Frame count: {frame_count}\n")
-            f.write(f"// Frame rate: {fps} FPS\n")
-            f.write(f"// Uncompressed bytes per frame: {bytes_per_frame}\n")
+        _write_frame_rows(f, name, "uint8_t", bytes_per_frame, frames)
 
-            if use_compression:
-                f.write(f"// Compression: RLE (Run-Length Encoding)\n")
-                f.write(f"// Compressed size: {total_compressed} bytes\n")
-                f.write(f"// Uncompressed size: {total_uncompressed} bytes\n")
-                f.write(f"// Compression ratio: {compression_ratio:.1f}% saved\n")
-            else:
-                f.write(f"// Total size: {total_compressed} bytes\n")
+        return [f"Size: {total_size / 1024:.2f} KB"]
 
-            f.write("\n#include <Arduino.h>\n\n")
+    def _emit_compressed(self, f, frames, name, fps, bytes_per_frame,
+                         packed_frames, run_words, delta_frames, compact_sizes):
+        """Write the body of an RLE compressed header; returns summary lines"""
 
-            # Frame count and FPS constants
-            f.write(f"const int {name}_FRAME_COUNT = {frame_count};\n")
-            f.write(f"const int {name}_FPS = {fps};\n")
-            f.write(f"const int {name}_FRAME_DELAY = {int(1000/fps)}; // milliseconds\n")
-            f.write(f"const int {name}_UNCOMPRESSED_SIZE = {bytes_per_frame};\n")
+        frame_count = len(frames)
 
-            if use_compression:
-                f.write(f"const int {name}_MAX_COMPRESSED_SIZE = {max_compressed_size};\n\n")
-
-                # Add RLE decompression function
-                f.write(f"// RLE Decompression function\n")
-                f.write(f"// Decompresses RLE data into output buffer\n")
-                f.write(f"// compressed: pointer to compressed data\n")
-                f.write(f"// compressed_size: size of compressed data\n")
-                f.write(f"// output: buffer to store decompressed data (must be {bytes_per_frame} bytes)\n")
-                f.write(f"void {name}_decompress(const uint8_t* compressed, int compressed_size, uint8_t* output) {{\n")
-                f.write(f"  int out_idx = 0;\n")
-                f.write(f"  for (int i = 0; i < compressed_size; i += 2) {{\n")
-                f.write(f"    uint8_t count = compressed[i];\n")
-                f.write(f"    uint8_t value = compressed[i + 1];\n")
-                f.write(f"    for (uint8_t j = 0; j < count; j++) {{\n")
-                f.write(f"      output[out_idx++] = value;\n")
-                f.write(f"    }}\n")
-                f.write(f"  }}\n")
-                f.write(f"}}\n\n")
-
-                # Compressed frame sizes array
-                f.write(f"const int {name}_frame_sizes[{frame_count}] = {{\n")
-                f.write("  ")
-                for i, size in enumerate(compressed_sizes):
-                    f.write(f"{size}")
-                    if i < frame_count - 1:
-                        f.write(", ")
-                    if (i + 1) % 10 == 0 and i < frame_count - 1:
-                        f.write("\n  ")
-                f.write("\n};\n\n")
-            else:
-                f.write("\n")
+        if delta_frames and frame_count > 1:
+            # XOR each frame with its predecessor; frame 0 stays whole
+            frames = np.asarray(frames, dtype=np.uint8)
+            deltas = frames.copy()
+            np.bitwise_xor(frames[1:], frames[:-1], out=deltas[1:])
+            frames = deltas
+
+        compressed_frames = [self.rle_compress(frame) for frame in frames]
+
+        # Size statistics come from NumPy reductions; the list form is only
+        # built once, for emission
+        sizes = np.fromiter(map(len, compressed_frames), dtype=np.int64, count=frame_count)
+        compressed_sizes = sizes.tolist()
+        max_compressed_size = int(sizes.max()) if frame_count else 0
+        total_compressed = int(sizes.sum())
+        total_uncompressed = frame_count * bytes_per_frame
+        compression_ratio = (1 - total_compressed / total_uncompressed) * 100 if total_uncompressed > 0 else 0
+
+        # Runs are stored either as bytes or as one uint16 word each
+        elem_type = "uint16_t" if run_words else "uint8_t"
+        unit = 2 if run_words else 1
+
+        f.write(f"// Compression: RLE (Run-Length Encoding)\n")
+        f.write(f"// Compressed size: {total_compressed} bytes\n")
+        f.write(f"// Uncompressed size: {total_uncompressed} bytes\n")
+        f.write(f"// Compression ratio: {compression_ratio:.1f}% saved\n")
+        if packed_frames:
+            f.write(f"// Layout: packed ({name}_flat + {name}_offsets)\n")
+        if run_words:
+            f.write(f"// Runs: uint16 words, (value << 8) | count\n")
+        if delta_frames:
+            f.write(f"// Frames 1+ are XOR deltas against the previous frame\n")
+
+        _write_constants(f, name, frame_count, fps, bytes_per_frame)
+        if delta_frames:
+            f.write(f"const int {name}_IS_DELTA = 1;\n")
+        f.write(f"const int {name}_MAX_COMPRESSED_SIZE = {max_compressed_size};\n\n")
+
+        # Add RLE decompression function
+        template = _DECOMPRESS_WORDS_TEMPLATE if run_words else _DECOMPRESS_TEMPLATE
+        f.write(template.format(name=name, bytes_per_frame=bytes_per_frame))
+
+        if delta_frames:
+            template = _DELTA_WORDS_TEMPLATE if run_words else _DELTA_TEMPLATE
+            f.write(template.format(name=name))
+
+        # Compressed frame sizes array
+        # 10 sizes per line
+        rows = [", ".join(map(str, compressed_sizes[j:j + 10])) for j in range(0, frame_count, 10)]
+        if compact_sizes:
+            size_type = "uint8_t" if max_compressed_size < 256 else "uint16_t"
+            f.write(f"const {size_type} PROGMEM {name}_frame_sizes[{frame_count}] = {{\n")
+        else:
+            f.write(f"const int {name}_frame_sizes[{frame_count}] = {{\n")
+        f.write("  " + ", \n  ".join(rows) + "\n};\n\n")
 
-            # Frame data array
-            if use_compression:
-                f.write(f"const uint8_t PROGMEM {name}_frames[][{max_compressed_size}] = {{\n")
-            else:
-                f.write(f"const uint8_t PROGMEM {name}_frames[][{bytes_per_frame}] = {{\n")
+        if packed_frames:
+            # Frame offsets into the flat array (in elements), with a
+            # trailing end offset
+            offsets = [0] + np.cumsum(sizes // unit).tolist()
 
-            for i, frame_data in enumerate(compressed_frames):
-                f.write("  {")
-                for j, byte in enumerate(frame_data):
-                    if j > 0:
-                        f.write(",")
-                    if j % 16 == 0:
-                        f.write("\n    ")
-                    f.write(f"0x{byte:02X}")
-
-                # Pad with zeros if using compression and frame is smaller than max
-                if use_compression and len(frame_data) < max_compressed_size:
-                    for j in range(len(frame_data), max_compressed_size):
-                        f.write(",")
-                        if j % 16 == 0:
-                            f.write("\n    ")
-                        f.write("0x00")
-
-                f.write("\n  }")
-                if i < frame_count - 1:
-                    f.write(",")
-                f.write(f"  // Frame {i}")
-                if use_compression:
-                    f.write(f" - {compressed_sizes[i]} bytes")
-                f.write("\n")
+            rows = [", ".join(map(str, offsets[j:j + 10])) for j in range(0, len(offsets), 10)]
+            f.write(f"const uint32_t PROGMEM {name}_offsets[{frame_count + 1}] = {{\n")
+            f.write("  " + ",\n  ".join(rows) + "\n};\n\n")
 
+            # All frames back to back, without padding
+            f.write(f"const {elem_type} PROGMEM {name}_flat[{total_compressed // unit}] = {{\n")
+            for i, frame_data in enumerate(compressed_frames):
+                f.write(f"  // Frame {i} - {compressed_sizes[i]} bytes\n")
+                f.write("    " + ",\n    ".join(_hex_lines(frame_data, words=run_words)))
+                f.write(",\n" if i < frame_count - 1 else "\n")
             f.write("};\n\n")
 
-            f.write(f"#endif // {guard_name}\n")
-
-        print(f"Generated: {output_path}")
-        if use_compression:
-            print(f"Uncompressed size: {total_uncompressed / 1024:.2f} KB")
-            print(f"Compressed size: {total_compressed / 1024:.2f} KB")
-            print(f"Space saved: {compression_ratio:.1f}%")
+            # Frame lookup helper
+            f.write(f"// Start of frame i within {name}_flat\n")
+            f.write(f"const {elem_type}* {name}_frame(int i) {{\n")
+            f.write(f"  return {name}_flat + {name}_offsets[i];\n")
+            f.write(f"}}\n\n")
         else:
-            print(f"Size: {total_compressed / 1024:.2f} KB")
+            _write_frame_rows(f, name, elem_type, max_compressed_size // unit,
+                              compressed_frames, compressed_sizes, run_words)
 
+        return [f"Uncompressed size: {total_uncompressed / 1024:.2f} KB",
+                f"Compressed size: {total_compressed / 1024:.2f} KB",
+                f"Space saved: {compression_ratio:.1f}%"]
 
-def main():
+
+def convert_one(gif_path):
+    """Convert a single GIF and return everything it printed"""
     converter = GifToFlash(128, 64)
 
+    # Create output name from filename (remove .gif extension and replace spaces/special chars)
+    output_name = gif_path.stem.replace(" ", "_").replace("-", "_").lower()
+
+    # Convert GIF (max 60 frames, 10 fps)
+    with io.StringIO() as log, contextlib.redirect_stdout(log):
+        converter.convert_gif(str(gif_path), output_name, max_frames=60, target_fps=10)
+        return log.getvalue()
+
+
+# Profile written by main(profile=True), next to this script
+PROFILE_FILE = "convert.pstats"
+
+
+def main(profile=False):
     # Get the directory where this script is located
     script_dir = Path(__file__).parent
 
@@ -272,14 +511,25 @@ def main():
     print(f"Found {len(gif_files)} GIF files")
     print()
 
-    # Process each GIF file
-    for gif_path in gif_files:
-        # Create output name from filename (remove .gif extension and replace spaces/special chars)
-        output_name = gif_path.stem.replace(" ", "_").replace("-", "_").lower()
-
-        # Convert GIF (max 60 frames, 10 fps)
-        converter.convert_gif(str(gif_path), output_name, max_frames=60, target_fps=10)
-        print()
+    if profile:
+        # Worker processes are invisible to cProfile, so convert in this
+        # process and report where the time went
+        profiler = cProfile.Profile()
+        profiler.enable()
+        for gif_path in gif_files:
+            print(convert_one(gif_path))
+        profiler.disable()
+
+        profile_path = script_dir / PROFILE_FILE
+        profiler.dump_stats(profile_path)
+        print(f"Profile saved to {profile_path}")
+        pstats.Stats(profiler).sort_stats("tottime").print_stats(15)
+    else:
+        # GIFs are independent, so convert them in worker processes; each
+        # worker's output is printed whole, in file order
+        with ProcessPoolExecutor() as executor:
+            for log in executor.map(convert_one, gif_files):
+                print(log)
 
     print("="*60)
     print("Conversion complete!")
@@ -295,4 +545,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(profile="--profile" in sys.argv[1:])